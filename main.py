@@ -14,28 +14,47 @@ Examples:
 import os
 import sys
 import re
+import mmap
+import shutil
+import codecs
 import argparse
 import subprocess
 import time
 from datetime import datetime
+from queue import Queue
+from threading import Thread
+from functools import lru_cache
 from pathlib import Path
 
-# Try to import required libraries
+# Pillow draws every screenshot, including --render mode, which needs
+# nothing else
+try:
+    from PIL import Image, ImageGrab, ImageDraw, ImageFont
+    PIL_AVAILABLE = True
+    PIL_IMPORT_ERROR = None
+except ImportError as e:
+    PIL_AVAILABLE = False
+    PIL_IMPORT_ERROR = e
+
+# Try to import the Windows-only GUI stack (pandas is imported by
+# process_excel when an Excel file is used). A failure is only reported
+# when the tool is run in Notepad++ mode, so --render and the parsing
+# helpers work without it.
+# pywin32 goes first so a non-Windows box fails before pyautogui tries to
+# reach a display; pyautogui itself can raise more than ImportError there
+# (e.g. KeyError: 'DISPLAY' on a headless Linux box).
 try:
-    import pyautogui
-    from PIL import Image, ImageGrab, ImageDraw
-    import pandas as pd
     import win32gui
+    import win32ui
+    import win32con
     import ctypes
     from ctypes import wintypes
+    import pyautogui
     LIBS_AVAILABLE = True
-except ImportError as e:
-    print(f"❌ Missing library: {e}")
-    print("   Run: pip install pyautogui pillow pandas openpyxl")
-    sys.exit(1)
-
-# Disable pyautogui pause for speed
-pyautogui.PAUSE = 0.1
+    IMPORT_ERROR = None
+except Exception as e:
+    LIBS_AVAILABLE = False
+    IMPORT_ERROR = e
 
 # Notepad++ path
 NOTEPAD_PATH = r"C:\Program Files\Notepad++\notepad++.exe"
@@ -43,6 +62,26 @@ NOTEPAD_PATH = r"C:\Program Files\Notepad++\notepad++.exe"
 # Screenshot folder
 SCREENSHOT_FOLDER = r"C:\Users\bhavi\Downloads\office work\edi\Screenshot"
 
+# Scintilla messages used to drive the Notepad++ editor directly
+SCI_GOTOPOS = 2025
+SCI_HOME = 2312
+SCI_LINEENDEXTEND = 2315
+
+# Control ID of the "Find what" combo box in the Notepad++ Find dialog
+IDC_FIND_WHAT = 1601
+
+# Offline rendering (--render): the EDI text is drawn with Pillow instead of
+# screenshotting Notepad++
+RENDER_FONT_NAME = "consola.ttf"
+RENDER_FONT_SIZE = 14
+RENDER_CONTEXT_LINES = 10
+RENDER_MAX_CHARS = 160
+RENDER_SELECTION_COLOR = (173, 214, 255)
+
+# Access rights needed to wait on a launched process
+SYNCHRONIZE = 0x00100000
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
 # Known EDI segments
 KNOWN_SEGMENTS = [
     'ISA', 'GS', 'ST', 'BHT', 'NM1', 'N3', 'N4', 'REF', 'PER', 'HL',
@@ -50,7 +89,45 @@ KNOWN_SEGMENTS = [
     'LX', 'LIN', 'CTP', 'CN1', 'HCP', 'AMT', 'SE', 'GE', 'IEA'
 ]
 
+# Patterns used by extract_segment_id (compiled once, used for every row)
+_WHEN_RE = re.compile(r'\s+when\s+.*$', re.IGNORECASE)
+_SIMPLE_RE = re.compile(r'^([A-Z]{2,3})(?:\d|$)')
+
+# Known segments longest first, so NM1/SV1 beat shorter IDs
+KNOWN_SEG_BY_LEN = tuple(sorted(KNOWN_SEGMENTS, key=len, reverse=True))
+
+# Set + distinct lengths (longest first) for O(1) prefix lookups
+_KNOWN_SEG_SET = frozenset(KNOWN_SEGMENTS)
+_KNOWN_SEG_LENGTHS = tuple(sorted({len(seg) for seg in KNOWN_SEGMENTS}, reverse=True))
+
+# All known segments in one alternation
+_SEG_ALT = '|'.join(KNOWN_SEG_BY_LEN)
+_SEG_RE = re.compile(rf'(?:^|\d{{4}}[A-Z]*)({_SEG_ALT})(?:\d|$)')
+
+# Characters not allowed in screenshot filenames
+_FN_CLEAN_RE = re.compile(r'[^\w\-]')
+# Segment boundaries for offline rendering: '~' terminator and/or line break
+_EDI_LINE_SPLIT_RE = re.compile(r'~\r?\n?|\r?\n')
+# Same mapping as _FN_CLEAN_RE for ASCII text, as a str.translate table
+_FN_CLEAN_TABLE = str.maketrans({
+    chr(c): '_' for c in range(128)
+    if not (chr(c).isalnum() or chr(c) in '_-')
+})
 
+
+def _match_known_prefix(text: str) -> str:
+    """Known segment at the start of text followed by a digit or the end, else None."""
+    text_len = len(text)
+    for length in _KNOWN_SEG_LENGTHS:
+        if text_len < length:
+            continue
+        seg = text[:length]
+        if seg in _KNOWN_SEG_SET and (text_len == length or text[length].isdecimal()):
+            return seg
+    return None
+
+
+@lru_cache(maxsize=4096)
 def extract_segment_id(edi_ref: str) -> str:
     """
     Extract the segment ID from an EDI reference.
@@ -66,69 +143,307 @@ def extract_segment_id(edi_ref: str) -> str:
     
     edi_ref = edi_ref.strip().upper()
     
+    # Fast path: ref starts with a known segment followed by a digit (e.g. 'BHT03')
+    seg = _match_known_prefix(edi_ref)
+    if seg:
+        return seg
+    
     # Handle compound fields - take first part
-    if '+' in edi_ref:
-        edi_ref = edi_ref.split('+')[0].strip()
+    edi_ref = edi_ref.partition('+')[0].rstrip()
     
-    # Remove qualifiers (-- BE, -BG, etc.)
-    edi_ref = re.sub(r'\s*--?\s*[A-Z]{2,3}(?:/[A-Z]{2,3})*\s*$', '', edi_ref)
+    # Remove qualifiers (-- BE, -BG, -BE/BF, etc.): 2-3 letter codes after the last dash
+    dash = edi_ref.rfind('-')
+    if dash != -1:
+        codes = edi_ref[dash + 1:].lstrip().split('/')
+        if all(2 <= len(code) <= 3 and code.isascii() and code.isalpha() for code in codes):
+            head = edi_ref[:dash]
+            if head.endswith('-'):
+                head = head[:-1]
+            edi_ref = head.rstrip()
     
-    # Remove parenthetical notes
-    edi_ref = re.sub(r'\s*\([^)]*\)\s*$', '', edi_ref)
+    # Remove parenthetical notes: from the first '(' after the last inner ')'
+    if edi_ref.endswith(')'):
+        opening = edi_ref.find('(', edi_ref.rfind(')', 0, -1) + 1)
+        if opening != -1:
+            edi_ref = edi_ref[:opening].rstrip()
     
     # Remove "when" conditions
-    edi_ref = re.sub(r'\s+when\s+.*$', '', edi_ref, flags=re.IGNORECASE)
+    if 'WHEN' in edi_ref:
+        edi_ref = _WHEN_RE.sub('', edi_ref)
     
     # Try to find a known segment in the reference
-    for seg in sorted(KNOWN_SEGMENTS, key=len, reverse=True):
-        pattern = rf'(?:^|\d{{4}}[A-Z]*)({seg})(?:\d|$)'
-        match = re.search(pattern, edi_ref)
-        if match:
-            return seg
+    match = _SEG_RE.search(edi_ref)
+    if match:
+        return match.group(1)
     
     # Fallback: check if starts with 2-3 letter segment
-    simple_match = re.match(r'^([A-Z]{2,3})(?:\d|$)', edi_ref)
+    simple_match = _SIMPLE_RE.match(edi_ref)
     if simple_match:
         return simple_match.group(1)
     
     return None
 
 
+def load_present_segments(edi_data: bytes, segment_ids: set) -> set:
+    """
+    Scan the EDI file contents once and return which of segment_ids it
+    contains; the scan stops as soon as all of them have been seen.
+    """
+    if not segment_ids:
+        return set()
+    
+    alternation = b'|'.join(
+        re.escape(seg.encode()) for seg in sorted(segment_ids, key=len, reverse=True)
+    )
+    pattern = re.compile(rb'(?:^|[~\n])(' + alternation + rb')\*')
+    
+    found = set()
+    for match in pattern.finditer(edi_data):
+        found.add(match.group(1).decode('ascii'))
+        if len(found) == len(segment_ids):
+            break
+    
+    return found
+
+
+@lru_cache(maxsize=128)
+def _segment_start_re(search_term: str):
+    """Compiled pattern matching search_term (e.g. 'NM1*') at the start of a segment."""
+    return re.compile(rb'(?:^|[~\n])' + re.escape(search_term.encode()))
+
+
+def _without_bom(edi_data: bytes):
+    """The file contents as Notepad++ shows them (a UTF-8 BOM is stripped)."""
+    bom = len(codecs.BOM_UTF8) if edi_data[:3] == codecs.BOM_UTF8 else 0
+    return memoryview(edi_data)[bom:]
+
+
+def count_segment_starts(edi_data: bytes, search_term: str) -> int:
+    """Number of segments in the file that start with search_term."""
+    return len(_segment_start_re(search_term).findall(_without_bom(edi_data)))
+
+
 def check_segment_exists(file_path: str, segment_id: str) -> bool:
     """Check if a segment exists in the EDI file."""
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-        
-        pattern = rf'(?:^|~|\n){segment_id}\*'
-        return bool(re.search(pattern, content))
+        needle = segment_id.encode()
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Cheap substring test first; the regex only confirms the segment boundary
+            if mm.find(needle + b'*') == -1:
+                return False
+            
+            return bool(_segment_start_re(segment_id + '*').search(mm))
     except Exception:
         return False
 
 
+# Background writer for screenshots: PNG encoding and disk writes run on this
+# thread so the next Notepad++ search does not wait for them
+_writer_queue = None
+_writer_thread = None
+# Screenshot path -> error for every write the writer thread could not do
+_writer_failures = {}
+
+
+def start_screenshot_writer():
+    """Start the background thread that saves (and copies) screenshots."""
+    global _writer_queue, _writer_thread
+    
+    _writer_queue = Queue(maxsize=8)
+    _writer_failures.clear()
+    
+    def worker():
+        while True:
+            job = _writer_queue.get()
+            if job is None:
+                break
+            path, func, args, kwargs = job
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                _writer_failures[path] = e
+    
+    _writer_thread = Thread(target=worker, daemon=True)
+    _writer_thread.start()
+
+
+def queue_file_job(path: str, func, *args, **kwargs):
+    """
+    Run a file write (func producing the file at path) on the writer thread,
+    or inline if it is not running - then errors are raised directly.
+    """
+    if _writer_thread is None:
+        func(*args, **kwargs)
+    else:
+        _writer_queue.put((path, func, args, kwargs))
+
+
+def copy_screenshot(source_path: str, target_path: str):
+    """Copy an already written screenshot (fails if writing the source failed)."""
+    if source_path in _writer_failures:
+        raise OSError(f"source screenshot was not written: {source_path}")
+    shutil.copyfile(source_path, target_path)
+
+
+def stop_screenshot_writer() -> dict:
+    """
+    Wait for all queued screenshots to be written and stop the writer.
+    Returns {screenshot path: error} for the writes that failed.
+    """
+    global _writer_queue, _writer_thread
+    
+    if _writer_thread is None:
+        return {}
+    
+    _writer_queue.put(None)
+    _writer_thread.join()
+    _writer_queue = None
+    _writer_thread = None
+    return dict(_writer_failures)
+
+
 def ensure_screenshot_folder():
-    """Create screenshot folder if it doesn't exist."""
-    if not os.path.exists(SCREENSHOT_FOLDER):
-        os.makedirs(SCREENSHOT_FOLDER)
+    """Create screenshot folder if it doesn't exist (called once per run)."""
+    os.makedirs(SCREENSHOT_FOLDER, exist_ok=True)
 
 
-def close_notepad_without_saving():
-    """Close the current Notepad++ instance."""
-    # Since we use -multiInst and -ro, we can just close the active window safely
-    pyautogui.hotkey('alt', 'f4')
-    time.sleep(0.5)
+def close_notepad_without_saving(hwnd: int):
+    """
+    Close the Notepad++ instance we opened (hwnd from open_notepad). WM_CLOSE
+    goes to exactly that window, so a Notepad++ the user has open is untouched.
+    """
+    if not hwnd or not win32gui.IsWindow(hwnd):
+        return
+    
+    # Since we use -multiInst and -ro, closing the window is safe
+    win32gui.PostMessage(hwnd, win32con.WM_CLOSE, 0, 0)
+    wait_for(lambda: not win32gui.IsWindow(hwnd), timeout=2.0)
     
     # We remove the 'n' press because -ro (Read Only) prevents the save dialog.
     # This keeps the terminal clean.
 
 
-def get_notepad_hwnd():
-    """Find the Notepad++ window handle."""
-    return win32gui.FindWindow("Notepad++", None)
+def get_notepad_hwnd(pid: int = None):
+    """
+    Find the Notepad++ window handle. With pid, only the top-level Notepad++
+    window owned by that process is returned (0 if it has none yet).
+    """
+    if pid is None:
+        return win32gui.FindWindow("Notepad++", None)
+    
+    window_pid = wintypes.DWORD()
+    hwnd = win32gui.FindWindowEx(0, 0, "Notepad++", None)
+    while hwnd:
+        ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(window_pid))
+        if window_pid.value == pid:
+            return hwnd
+        hwnd = win32gui.FindWindowEx(0, hwnd, "Notepad++", None)
+    return 0
 
 
-def get_caret_position():
-    """Gets the current caret position on screen."""
+def get_foreground_class() -> str:
+    """Window class name of the current foreground window ('' if none)."""
+    hwnd = win32gui.GetForegroundWindow()
+    return win32gui.GetClassName(hwnd) if hwnd else ''
+
+
+def ensure_notepad_focus(hwnd: int) -> bool:
+    """
+    Make sure the Notepad++ window is in the foreground. Returns False if the
+    window is gone. When something else has focus, the input of its thread is
+    attached to ours first, so SetForegroundWindow is allowed instead of
+    failing on the focus-steal lock.
+    """
+    if not hwnd or not win32gui.IsWindow(hwnd):
+        return False
+    
+    foreground = win32gui.GetForegroundWindow()
+    if foreground == hwnd:
+        return True
+    
+    user32 = ctypes.windll.user32
+    current_thread = ctypes.windll.kernel32.GetCurrentThreadId()
+    foreground_thread = user32.GetWindowThreadProcessId(foreground, None) if foreground else 0
+    attached = (foreground_thread and foreground_thread != current_thread
+                and user32.AttachThreadInput(current_thread, foreground_thread, True))
+    try:
+        user32.SetForegroundWindow(hwnd)
+    finally:
+        if attached:
+            user32.AttachThreadInput(current_thread, foreground_thread, False)
+    
+    return win32gui.GetForegroundWindow() == hwnd
+
+
+def wait_for(condition, timeout: float = 5.0, interval: float = 0.02):
+    """
+    Poll condition() until it returns a truthy value or the timeout expires.
+    Returns the last value of condition() so callers can use the result.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        result = condition()
+        if result or time.monotonic() >= deadline:
+            return result
+        time.sleep(interval)
+
+
+def wait_for_input_idle(pid: int, timeout: float = 5.0):
+    """
+    Block until the process has finished starting up and is waiting for
+    input (WaitForInputIdle), instead of polling from the first moment.
+    """
+    process_handle = ctypes.windll.kernel32.OpenProcess(
+        SYNCHRONIZE | PROCESS_QUERY_LIMITED_INFORMATION, False, pid
+    )
+    if not process_handle:
+        return
+    try:
+        ctypes.windll.user32.WaitForInputIdle(process_handle, int(timeout * 1000))
+    finally:
+        ctypes.windll.kernel32.CloseHandle(process_handle)
+
+
+def open_notepad(abs_path: str):
+    """
+    Launch a read-only Notepad++ instance for the file and wait until its
+    window and editor are up and focused (instead of sleeping a fixed amount).
+    """
+    # -ro: Read Only, -multiInst: Separate instance, -nosession: No history
+    process = subprocess.Popen([NOTEPAD_PATH, "-ro", "-multiInst", "-nosession", abs_path])
+    wait_for_input_idle(process.pid)
+    
+    # Our window is the one owned by the process we started, whatever other
+    # Notepad++ windows the user has open
+    hwnd = wait_for(lambda: get_notepad_hwnd(process.pid))
+    if hwnd:
+        wait_for(lambda: get_scintilla_hwnd(hwnd), timeout=2.0)
+        wait_for(lambda: ensure_notepad_focus(hwnd), timeout=2.0)
+    return hwnd
+
+
+def wait_for_caret_to_settle(start: tuple = None, timeout: float = 1.0):
+    """
+    Wait until the caret has moved away from start (if given) and then
+    stayed in place for two consecutive polls.
+    """
+    if start is not None:
+        wait_for(lambda: get_caret_position() != start, timeout=0.4)
+    
+    last = get_caret_position()
+    stable_polls = 0
+    
+    def settled():
+        nonlocal last, stable_polls
+        current = get_caret_position()
+        stable_polls = stable_polls + 1 if current == last else 0
+        last = current
+        return stable_polls >= 2
+    
+    wait_for(settled, timeout=timeout)
+
+
+if LIBS_AVAILABLE:
     class GUITHREADINFO(ctypes.Structure):
         _fields_ = [
             ("cbSize", wintypes.DWORD),
@@ -142,51 +457,106 @@ def get_caret_position():
             ("rcCaret", wintypes.RECT),
         ]
     
-    gui_info = GUITHREADINFO()
-    gui_info.cbSize = ctypes.sizeof(GUITHREADINFO)
-    
+    # Allocated once: the caret is polled many times per screenshot
+    _GUI_INFO = GUITHREADINFO(cbSize=ctypes.sizeof(GUITHREADINFO))
+    _CARET_POINT = wintypes.POINT()
+
+
+def get_caret_position():
+    """Gets the current caret position on screen."""
     user32 = ctypes.windll.user32
-    if user32.GetGUIThreadInfo(0, ctypes.byref(gui_info)):
-        caret_rect = gui_info.rcCaret
-        hwnd_caret = gui_info.hwndCaret
+    if user32.GetGUIThreadInfo(0, ctypes.byref(_GUI_INFO)):
+        caret_rect = _GUI_INFO.rcCaret
+        hwnd_caret = _GUI_INFO.hwndCaret
         
         if hwnd_caret:
             caret_height = caret_rect.bottom - caret_rect.top
-            point = wintypes.POINT()
-            point.x = caret_rect.left
-            point.y = caret_rect.top
-            user32.ClientToScreen(hwnd_caret, ctypes.byref(point))
-            return point.x, point.y, caret_height
+            _CARET_POINT.x = caret_rect.left
+            _CARET_POINT.y = caret_rect.top
+            user32.ClientToScreen(hwnd_caret, ctypes.byref(_CARET_POINT))
+            return _CARET_POINT.x, _CARET_POINT.y, caret_height
     
     # Fallback
     pos = pyautogui.position()
     return pos[0], pos[1], 20
 
 
-def take_screenshot_with_red_box(filename: str, bounds: tuple = None) -> str:
+def get_screenshot_path(filename: str) -> str:
+    """Build the screenshot file path for a (sanitized) filename."""
+    filename = filename[:50]
+    if filename.isascii():
+        clean_filename = filename.translate(_FN_CLEAN_TABLE)
+    else:
+        clean_filename = _FN_CLEAN_RE.sub('_', filename)
+    return os.path.join(SCREENSHOT_FOLDER, f"{clean_filename}.png")
+
+
+def grab_window(hwnd: int, width: int, height: int):
+    """
+    Copy the Notepad++ window straight from its device context with BitBlt,
+    so only the window's pixels are moved instead of the whole desktop.
+    """
+    window_dc = win32gui.GetWindowDC(hwnd)
+    source_dc = win32ui.CreateDCFromHandle(window_dc)
+    memory_dc = source_dc.CreateCompatibleDC()
+    bitmap = win32ui.CreateBitmap()
+    try:
+        bitmap.CreateCompatibleBitmap(source_dc, width, height)
+        memory_dc.SelectObject(bitmap)
+        memory_dc.BitBlt((0, 0), (width, height), source_dc, (0, 0), win32con.SRCCOPY)
+        bits = bitmap.GetBitmapBits(True)
+        return Image.frombuffer('RGB', (width, height), bits, 'raw', 'BGRX', 0, 1)
+    finally:
+        # The bitmap can only be deleted once no DC has it selected
+        memory_dc.DeleteDC()
+        source_dc.DeleteDC()
+        win32gui.ReleaseDC(hwnd, window_dc)
+        win32gui.DeleteObject(bitmap.GetHandle())
+
+
+def take_screenshot_with_red_box(filename: str, bounds: tuple = None, hwnd: int = None) -> str:
     """
     Take a screenshot with red box based on caret position.
     The filename is provided, bounds argument is ignored (kept for compatibility).
+    hwnd is the Notepad++ window if the caller already has it (looked up otherwise).
+    The screenshot folder must already exist (see ensure_screenshot_folder).
     """
-    ensure_screenshot_folder()
-    
     # Get Notepad++ Window info
-    hwnd = get_notepad_hwnd()
-    time.sleep(0.08)
+    if not hwnd:
+        hwnd = get_notepad_hwnd()
     
     caret_x, caret_y, caret_height = get_caret_position()
     
+    rect = None
     if hwnd:
         try:
             rect = win32gui.GetWindowRect(hwnd)
-            win_left, win_top, win_right, win_bottom = rect
         except Exception:
             # Fallback if window not found or error
-            win_left, win_top = 0, 0
-    else:
-        win_left, win_top = 0, 0
+            rect = None
     
-    screenshot = pyautogui.screenshot()
+    screenshot = None
+    if rect:
+        win_left, win_top, win_right, win_bottom = rect
+        
+        # Capture only the Notepad++ window, straight from its DC
+        try:
+            screenshot = grab_window(hwnd, win_right - win_left, win_bottom - win_top)
+            origin_x, origin_y = win_left, win_top
+        except Exception:
+            screenshot = None
+        
+        if screenshot is None:
+            # Fallback: screen capture of the window region (clamped to the screen)
+            screen = pyautogui.size()
+            origin_x, origin_y = max(0, win_left), max(0, win_top)
+            width = min(screen.width, win_right) - origin_x
+            height = min(screen.height, win_bottom) - origin_y
+            screenshot = pyautogui.screenshot(region=(origin_x, origin_y, width, height))
+    else:
+        win_left = 0
+        origin_x, origin_y = 0, 0
+        screenshot = pyautogui.screenshot()
     
     # Draw rectangle around selected line
     draw = ImageDraw.Draw(screenshot)
@@ -195,80 +565,216 @@ def take_screenshot_with_red_box(filename: str, bounds: tuple = None) -> str:
     # Logic from user request:
     # Left bound = Window Left + 60 (skipping line numbers)
     # Right bound = Caret X + 10 (end of selection/line)
-    rect_left = win_left + 60
-    rect_right = caret_x + 10
-    rect_top = caret_y - padding
-    rect_bottom = caret_y + caret_height + padding
-    
-    clean_filename = re.sub(r'[^\w\-]', '_', filename)[:50]
-    filepath = os.path.join(SCREENSHOT_FOLDER, f"{clean_filename}.png")
-    
-    for i in range(3):
-        draw.rectangle(
-            [rect_left - i, rect_top - i, rect_right + i, rect_bottom + i],
-            outline="red"
-        )
+    # Screen coordinates are shifted into the captured region
+    rect_left = win_left + 60 - origin_x
+    rect_right = caret_x + 10 - origin_x
+    rect_top = caret_y - padding - origin_y
+    rect_bottom = caret_y + caret_height + padding - origin_y
     
-    screenshot.save(filepath)
+    filepath = get_screenshot_path(filename)
+    
+    # One 3px stroke drawn inward from the outer edge (same pixels as
+    # three nested 1px outlines)
+    rect_right = max(rect_right, rect_left)
+    draw.rectangle(
+        [rect_left - 2, rect_top - 2, rect_right + 2, rect_bottom + 2],
+        outline="red", width=3
+    )
+    
+    # Fast zlib level: these PNGs are reviewed once, not archived
+    queue_file_job(filepath, screenshot.save, filepath, format='PNG', compress_level=1, optimize=False)
     
     return filepath
 
 
-def search_and_screenshot(file_path: str, search_term: str, filename: str, notepad_open: bool = False) -> str:
+def load_edi_lines(edi_data: bytes):
     """
-    Search in Notepad++ and take screenshot.
+    Split the EDI file into one line per segment and index the lines of each
+    segment ID in file order, so every lookup in render mode is a dict probe.
     """
-    abs_path = os.path.abspath(file_path)
+    text = edi_data.decode('utf-8-sig', errors='replace')
+    lines = [line for line in _EDI_LINE_SPLIT_RE.split(text) if line]
     
-    if not notepad_open:
-        subprocess.Popen([NOTEPAD_PATH, "-ro", "-multiInst", "-nosession", abs_path])
-        time.sleep(1.5)
+    lines_by_segment = {}
+    for index, line in enumerate(lines):
+        lines_by_segment.setdefault(line.partition('*')[0], []).append(index)
+    
+    return lines, lines_by_segment
+
+
+@lru_cache(maxsize=1)
+def get_render_font():
+    """Monospaced font for render mode (Pillow's built-in font if Consolas is missing)."""
+    try:
+        return ImageFont.truetype(RENDER_FONT_NAME, RENDER_FONT_SIZE)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def render_segment_screenshot(lines: list, lines_by_segment: dict,
+                              segment_id: str, filename: str, occurrence: int = 0) -> str:
+    """
+    Draw the given occurrence (0 = first, wrapping around) of segment_id and
+    its surrounding lines, with the line selected and boxed in red like the
+    Notepad++ screenshot - no GUI involved.
+    Returns None if the segment has no line in the file.
+    """
+    indexes = lines_by_segment.get(segment_id)
+    if not indexes:
+        return None
+    index = indexes[occurrence % len(indexes)]
+    
+    start = max(0, index - RENDER_CONTEXT_LINES)
+    shown = [line[:RENDER_MAX_CHARS] for line in lines[start:index + RENDER_CONTEXT_LINES + 1]]
+    row = index - start
+    
+    font = get_render_font()
+    char_width = font.getlength('M')
+    line_height = RENDER_FONT_SIZE + 6
+    margin = 10
+    
+    width = int(margin * 2 + char_width * max(len(line) for line in shown)) + 8
+    height = margin * 2 + line_height * len(shown)
+    image = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(image)
+    
+    # Selection behind the matched line, then the text, then the red box
+    row_top = margin + row * line_height
+    row_right = int(margin + char_width * len(shown[row]))
+    draw.rectangle([margin, row_top, row_right, row_top + line_height - 1],
+                   fill=RENDER_SELECTION_COLOR)
+    for i, line in enumerate(shown):
+        draw.text((margin, margin + i * line_height), line, fill='black', font=font)
+    draw.rectangle([margin - 4, row_top - 3, row_right + 4, row_top + line_height + 2],
+                   outline="red", width=3)
     
+    filepath = get_screenshot_path(filename)
+    queue_file_job(filepath, image.save, filepath, format='PNG', compress_level=1, optimize=False)
+    
+    return filepath
+
+
+def get_scintilla_hwnd(hwnd: int) -> int:
+    """Find the Scintilla editor control inside the Notepad++ window."""
+    return win32gui.FindWindowEx(hwnd, 0, "Scintilla", None)
+
+
+def select_line_with_scintilla(hwnd: int, sci_hwnd: int, edi_data: bytes,
+                               search_term: str, occurrence: int = 0) -> bool:
+    """
+    Select the given occurrence (0 = first, wrapping around) of a segment
+    starting with search_term - the same line --render draws - by sending
+    Scintilla messages: no keystrokes, clipboard or sleeps. The match is
+    located in the file bytes, so only integer positions cross the process
+    boundary.
+    Returns False if no segment starts with the term.
+    """
+    # Notepad++ strips a UTF-8 BOM, so editor positions start after it
+    matches = list(_segment_start_re(search_term).finditer(_without_bom(edi_data)))
+    if not matches:
+        return False
+    pos = matches[occurrence % len(matches)].end() - len(search_term.encode())
+    
+    # The caret position is read from the foreground window, so keep Notepad++ there
+    ensure_notepad_focus(hwnd)
+    
+    # Go to the match, then Home + Shift+End; the caret ends at the END of the line
+    win32gui.SendMessage(sci_hwnd, SCI_GOTOPOS, pos, 0)
+    win32gui.SendMessage(sci_hwnd, SCI_HOME, 0, 0)
+    win32gui.SendMessage(sci_hwnd, SCI_LINEENDEXTEND, 0, 0)
+    
+    # Repaint now so the selection and caret are on screen for the capture
+    win32gui.UpdateWindow(sci_hwnd)
+    return True
+
+
+def get_find_what_edit(dialog_hwnd: int) -> int:
+    """Edit control inside the Find dialog's "Find what" combo box (0 if not found)."""
+    try:
+        combo = win32gui.GetDlgItem(dialog_hwnd, IDC_FIND_WHAT)
+        return win32gui.FindWindowEx(combo, 0, "Edit", None) if combo else 0
+    except Exception:
+        return 0
+
+
+def search_with_keystrokes(search_term: str, occurrence: int = 0):
+    """
+    Search through the Notepad++ Find dialog and select the line of the given
+    match (0 = first; Find Next wraps around).
+    """
     # Ensure tool window is center-focused before searching
     pyautogui.click(pyautogui.size().width // 2, pyautogui.size().height // 2)
-    time.sleep(0.2)
+    wait_for(lambda: get_foreground_class() == "Notepad++", timeout=1.0)
     
-    # Open Find dialog (Ctrl+F)
+    # Start from the top so Find Next counts matches from the first one, like
+    # the Scintilla path; then open Find dialog (Ctrl+F) and wait for it to take focus
+    pyautogui.hotkey('ctrl', 'home')
     pyautogui.hotkey('ctrl', 'f')
-    time.sleep(0.5)
+    wait_for(lambda: get_foreground_class() == "#32770", timeout=2.0)
     
-    # Clear and type search term
-    pyautogui.hotkey('ctrl', 'a')
-    time.sleep(0.1)
-    pyautogui.typewrite(search_term, interval=0.01)
-    time.sleep(0.2)
+    # Put the search term straight into the "Find what" box; fall back to
+    # clearing and typing it if the edit control can't be found
+    find_edit = get_find_what_edit(win32gui.GetForegroundWindow())
+    if find_edit:
+        win32gui.SendMessage(find_edit, win32con.WM_SETTEXT, 0, search_term)
+    else:
+        pyautogui.hotkey('ctrl', 'a')
+        pyautogui.typewrite(search_term)
     
-    # Search
-    pyautogui.press('enter')
-    time.sleep(0.3)
+    # Find Next once per occurrence, then close the Find dialog (queued back
+    # to back in one call)
+    pyautogui.press(['enter'] * (occurrence + 1) + ['escape'])
     
-    # Close Find dialog
-    pyautogui.press('escape')
-    time.sleep(0.3)
+    # Wait for focus to return to the editor
+    wait_for(lambda: get_foreground_class() == "Notepad++", timeout=2.0)
     
     # Select the line (Home, then Shift+End)
     # This places the caret at the END of the line, which is crucial for our new box logic
+    caret_before = get_caret_position()
     pyautogui.press('home')
-    time.sleep(0.1)
     pyautogui.hotkey('shift', 'end')
-    time.sleep(0.4)
+    wait_for_caret_to_settle(caret_before)
+
 
+def search_and_screenshot(file_path: str, search_term: str, filename: str,
+                          notepad_open: bool = False, hwnd: int = None,
+                          edi_data: bytes = None, occurrence: int = 0) -> str:
+    """
+    Search in Notepad++ and take screenshot.
+    hwnd is the already-open Notepad++ window, so batch callers resolve it once.
+    edi_data is the raw file contents; with it the editor is driven directly.
+    occurrence picks which match of search_term to show (0 = first).
+    """
+    abs_path = os.path.abspath(file_path)
+    
+    if not notepad_open:
+        hwnd = open_notepad(abs_path)
+    
+    # Move to the match and select its line: directly through Scintilla when we
+    # have the editor and the file contents, otherwise through the Find dialog
+    sci_hwnd = get_scintilla_hwnd(hwnd) if hwnd and edi_data is not None else 0
+    if not (sci_hwnd and select_line_with_scintilla(hwnd, sci_hwnd, edi_data,
+                                                    search_term, occurrence)):
+        search_with_keystrokes(search_term, occurrence)
+    
     # Note: We no longer need to find bounds before deselecting.
     # Actually, we don't even need to deselect if we just want the caret position.
     # But the user's logic draws the box. 
     # If the text is highlighted blue, the red box will be around it.
     
-    screenshot_path = take_screenshot_with_red_box(filename)
+    screenshot_path = take_screenshot_with_red_box(filename, hwnd=hwnd)
     
     return screenshot_path
 
 
-def process_excel(file_path: str, excel_path: str, row_range: str = None):
+def process_excel(file_path: str, excel_path: str, row_range: str = None,
+                  render: bool = False):
     """
     Process ALL segments from Excel file.
     - Column A (GDF_Field) = Screenshot filename
     - Original_EDI_Field = What to search for
     - row_range: Optional range string (e.g., '1-10', '5-', '-20')
+    - render: Draw the lines with Pillow instead of screenshotting Notepad++
     """
     # Check files exist
     if not os.path.exists(file_path):
@@ -279,23 +785,35 @@ def process_excel(file_path: str, excel_path: str, row_range: str = None):
         print(f"❌ Excel file not found: {excel_path}")
         sys.exit(1)
     
-    if not os.path.exists(NOTEPAD_PATH):
+    if not render and not os.path.exists(NOTEPAD_PATH):
         print(f"❌ Notepad++ not found: {NOTEPAD_PATH}")
         sys.exit(1)
     
-    # Read Excel
-    df = pd.read_excel(excel_path)
-    
-    # Check required columns
-    if 'GDF_Field' not in df.columns:
-        print(f"❌ Column 'GDF_Field' not found in Excel")
-        print(f"   Available columns: {df.columns.tolist()}")
+    # pandas is only needed here, so --segment runs don't pay for importing it
+    try:
+        import pandas as pd
+    except ImportError as e:
+        print(f"❌ Missing library: {e}")
+        print("   Run: pip install pandas openpyxl")
         sys.exit(1)
     
-    if 'Original_EDI_Field' not in df.columns:
-        print(f"❌ Column 'Original_EDI_Field' not found in Excel")
-        print(f"   Available columns: {df.columns.tolist()}")
-        sys.exit(1)
+    # Read Excel - only the two columns we use, as plain strings
+    # (keep_default_na=False leaves empty cells as '' instead of NaN)
+    required_columns = ('GDF_Field', 'Original_EDI_Field')
+    df = pd.read_excel(
+        excel_path,
+        usecols=lambda col: col in required_columns,
+        dtype=str,
+        keep_default_na=False,
+    )
+    
+    # Check required columns
+    for column in required_columns:
+        if column not in df.columns:
+            print(f"❌ Column '{column}' not found in Excel")
+            available = pd.read_excel(excel_path, nrows=0).columns.tolist()
+            print(f"   Available columns: {available}")
+            sys.exit(1)
     
     # Apply range filter if provided
     total_rows = len(df)
@@ -329,101 +847,174 @@ def process_excel(file_path: str, excel_path: str, row_range: str = None):
             print(f"❌ Invalid range format: {row_range}. Expected format: 'start-end', 'start-', or '-end'.")
             sys.exit(1)
     
-    print(f"\n{'='*60}")
-    print("EDI SEGMENT SEARCH - BATCH PROCESSING")
-    print(f"{'='*60}")
-    print(f"📄 EDI File: {file_path}")
-    print(f"📊 Excel File: {excel_path}")
-    print(f"📋 Rows to process: {len(df)}")
-    print(f"📁 Screenshots: {SCREENSHOT_FOLDER}")
-    print(f"\n📝 Filename from: GDF_Field (Column A)")
-    print(f"🔍 Search from: Original_EDI_Field")
+    # Each report block goes out as one write instead of a print per line
+    print("\n".join([
+        f"\n{'='*60}",
+        "EDI SEGMENT SEARCH - BATCH PROCESSING",
+        f"{'='*60}",
+        f"📄 EDI File: {file_path}",
+        f"📊 Excel File: {excel_path}",
+        f"📋 Rows to process: {len(df)}",
+        f"📁 Screenshots: {SCREENSHOT_FOLDER}",
+        f"\n📝 Filename from: GDF_Field (Column A)",
+        f"🔍 Search from: Original_EDI_Field",
+    ]))
     
     ensure_screenshot_folder()
     
+    # Normalize both columns and drop empty rows in one vectorized pass, then
+    # pull them out as plain lists (far cheaper to walk than df.iterrows())
+    gdf_col = df['GDF_Field'].str.strip()
+    edi_col = df['Original_EDI_Field'].str.strip()
+    mask = gdf_col.ne('') & edi_col.ne('')
+    gdf_fields = gdf_col[mask].tolist()
+    edi_refs = edi_col[mask].tolist()
+    
+    # Read the EDI file once; it is scanned here and reused for every search
+    abs_path = os.path.abspath(file_path)
+    edi_data = Path(abs_path).read_bytes()
+    
+    # Resolve segment IDs up front, then scan the EDI data once for just those;
+    # every row is then a set lookup
+    wanted_segments = {extract_segment_id(edi_ref) for edi_ref in edi_refs}
+    wanted_segments.discard(None)
+    present_segments = load_present_segments(edi_data, wanted_segments)
+    
     # Track results
     not_found = []
     found_count = 0
     screenshot_count = 0
-    abs_path = os.path.abspath(file_path)
+    screenshots_by_match = {}
+    match_count_by_term = {}
+    rows_by_term = {}
+    screenshot_rows = []
     
-    # Open Notepad++ once
-    # -ro: Read Only, -multiInst: Separate instance, -nosession: No history
-    subprocess.Popen([NOTEPAD_PATH, "-ro", "-multiInst", "-nosession", abs_path])
-    time.sleep(1.5)
+    # Open Notepad++ once and keep its window handle for every screenshot
+    # (render mode instead splits the file into segment lines once)
+    if render:
+        edi_lines, lines_by_segment = load_edi_lines(edi_data)
+    else:
+        notepad_hwnd = open_notepad(abs_path)
     
     print(f"\n⏳ Processing {len(df)} rows...")
     
-    for idx, row in df.iterrows():
-        gdf_field = str(row.get('GDF_Field', '')).strip()
-        edi_ref = str(row.get('Original_EDI_Field', '')).strip()
-        
-        if not gdf_field or gdf_field == 'nan':
-            continue
-        if not edi_ref or edi_ref == 'nan':
-            continue
-        
-        # Extract segment ID from EDI reference
-        segment_id = extract_segment_id(edi_ref)
-        
-        if not segment_id:
-            not_found.append(f"{gdf_field} ({edi_ref})")
-            continue
-        
-        # Check if segment exists in EDI file
-        if not check_segment_exists(file_path, segment_id):
-            not_found.append(f"{gdf_field} ({edi_ref})")
-            continue
-        
-        # Found - search and screenshot
-        search_term = f"{segment_id}*"
-        search_and_screenshot(file_path, search_term, gdf_field, notepad_open=True)
-        found_count += 1
-        screenshot_count += 1
-        
-        # Progress indicator
-        if screenshot_count % 10 == 0:
-            print(f"   📸 {screenshot_count} screenshots taken...")
-        
-        # Small delay between searches
-        time.sleep(0.2)
+    # Screenshots (and copies of them) are written in the background; the
+    # writer preserves order, so a copy always runs after its source is saved
+    start_screenshot_writer()
+    try:
+        for gdf_field, edi_ref in zip(gdf_fields, edi_refs):
+            # Extract segment ID from EDI reference
+            segment_id = extract_segment_id(edi_ref)
+            
+            if not segment_id:
+                not_found.append(f"{gdf_field} ({edi_ref})")
+                continue
+            
+            # Check if segment exists in EDI file
+            if segment_id not in present_segments:
+                not_found.append(f"{gdf_field} ({edi_ref})")
+                continue
+            
+            # Found - rows repeating a search term take its successive matches in
+            # file order (like Find Next did), wrapping after the last one; a
+            # match that already has a PNG is copied instead of searched again
+            search_term = f"{segment_id}*"
+            if search_term not in match_count_by_term:
+                match_count_by_term[search_term] = count_segment_starts(edi_data, search_term)
+            occurrence = rows_by_term.get(search_term, 0)
+            rows_by_term[search_term] = occurrence + 1
+            match_key = (search_term, occurrence % max(1, match_count_by_term[search_term]))
+            
+            if match_key in screenshots_by_match:
+                source_path = screenshots_by_match[match_key]
+                screenshot_path = get_screenshot_path(gdf_field)
+                if screenshot_path != source_path:
+                    queue_file_job(screenshot_path, copy_screenshot, source_path, screenshot_path)
+            elif render:
+                screenshot_path = render_segment_screenshot(
+                    edi_lines, lines_by_segment, segment_id, gdf_field, occurrence
+                )
+                if not screenshot_path:
+                    not_found.append(f"{gdf_field} ({edi_ref})")
+                    continue
+                screenshots_by_match[match_key] = screenshot_path
+            else:
+                screenshot_path = search_and_screenshot(
+                    file_path, search_term, gdf_field, notepad_open=True,
+                    hwnd=notepad_hwnd, edi_data=edi_data, occurrence=occurrence
+                )
+                screenshots_by_match[match_key] = screenshot_path
+            screenshot_rows.append((gdf_field, edi_ref, screenshot_path))
+            found_count += 1
+            screenshot_count += 1
+            
+            # Progress indicator
+            if screenshot_count % 10 == 0:
+                print(f"   📸 {screenshot_count} screenshots taken...")
+    finally:
+        write_failures = stop_screenshot_writer()
+    
+    # Rows whose PNG could not be written (or copied) were not taken
+    failed = [
+        f"{gdf_field} ({edi_ref}): {write_failures[path]}"
+        for gdf_field, edi_ref, path in screenshot_rows if path in write_failures
+    ]
+    screenshot_count -= len(failed)
     
     # Print results
-    print(f"\n{'='*60}")
-    print("RESULTS")
-    print(f"{'='*60}")
-    print(f"✅ Found: {found_count}")
-    print(f"📸 Screenshots taken: {screenshot_count}")
-    print(f"❌ Not Found: {len(not_found)}")
+    report = [
+        f"\n{'='*60}",
+        "RESULTS",
+        f"{'='*60}",
+        f"✅ Found: {found_count}",
+        f"📸 Screenshots taken: {screenshot_count}",
+        f"❌ Not Found: {len(not_found)}",
+    ]
+    if failed:
+        report.append(f"⚠️ Screenshots failed: {len(failed)}")
     
     if not_found:
-        print(f"\n{'='*60}")
-        print("❌ NOT FOUND SEGMENTS:")
-        print(f"{'='*60}")
-        for seg in not_found:
-            print(f"   • {seg}")
+        report += [
+            f"\n{'='*60}",
+            "❌ NOT FOUND SEGMENTS:",
+            f"{'='*60}",
+        ]
+        report += [f"   • {seg}" for seg in not_found]
+    
+    if failed:
+        report += [
+            f"\n{'='*60}",
+            "⚠️ FAILED SCREENSHOTS:",
+            f"{'='*60}",
+        ]
+        report += [f"   • {row}" for row in failed]
+    
+    print("\n".join(report))
     
     # Close Notepad++ without saving
-    print(f"\n🔒 Closing Notepad++ without saving...")
-    close_notepad_without_saving()
+    if not render:
+        print(f"\n🔒 Closing Notepad++ without saving...")
+        close_notepad_without_saving(notepad_hwnd)
     
     print(f"\n📁 Screenshots saved to: {SCREENSHOT_FOLDER}")
 
 
-def process_single_segment(file_path: str, segment_ref: str):
-    """Process a single segment."""
+def process_single_segment(file_path: str, segment_ref: str, render: bool = False):
+    """Process a single segment (render: draw it with Pillow, no Notepad++)."""
     segment_id = extract_segment_id(segment_ref)
     
     if not segment_id:
         print(f"❌ Could not parse segment: {segment_ref}")
         sys.exit(1)
     
-    print(f"\n{'='*50}")
-    print("EDI SEGMENT SEARCH - SINGLE")
-    print(f"{'='*50}")
-    print(f"📄 File: {file_path}")
-    print(f"🔍 Reference: {segment_ref}")
-    print(f"📍 Segment ID: {segment_id}")
+    print("\n".join([
+        f"\n{'='*50}",
+        "EDI SEGMENT SEARCH - SINGLE",
+        f"{'='*50}",
+        f"📄 File: {file_path}",
+        f"🔍 Reference: {segment_ref}",
+        f"📍 Segment ID: {segment_id}",
+    ]))
     
     if not check_segment_exists(file_path, segment_id):
         print(f"\n❌ NOT FOUND: '{segment_id}' not in EDI file")
@@ -431,19 +1022,31 @@ def process_single_segment(file_path: str, segment_ref: str):
     
     print(f"\n✅ Segment '{segment_id}' found!")
     
-    # Open Notepad++
+    ensure_screenshot_folder()
     abs_path = os.path.abspath(file_path)
-    subprocess.Popen([NOTEPAD_PATH, "-ro", "-multiInst", "-nosession", abs_path])
-    time.sleep(1.5)
+    
+    if render:
+        edi_lines, lines_by_segment = load_edi_lines(Path(abs_path).read_bytes())
+        screenshot_path = render_segment_screenshot(
+            edi_lines, lines_by_segment, segment_id, segment_ref
+        )
+        print(f"\n📸 Screenshot saved: {screenshot_path}")
+        return
+    
+    # Open Notepad++
+    notepad_hwnd = open_notepad(abs_path)
     
     search_term = f"{segment_id}*"
-    screenshot_path = search_and_screenshot(file_path, search_term, segment_ref, notepad_open=True)
+    screenshot_path = search_and_screenshot(
+        file_path, search_term, segment_ref, notepad_open=True,
+        hwnd=notepad_hwnd, edi_data=Path(abs_path).read_bytes()
+    )
     
     print(f"\n📸 Screenshot saved: {screenshot_path}")
     
     # Close Notepad++ without saving
     print(f"\n🔒 Closing Notepad++ without saving...")
-    close_notepad_without_saving()
+    close_notepad_without_saving(notepad_hwnd)
 
 
 def main():
@@ -459,6 +1062,9 @@ Examples:
   
   # Process single segment
   python edi_search_tool.py --file EDI.txt --segment BHT03
+  
+  # Draw the lines offline instead of driving Notepad++
+  python edi_search_tool.py --file EDI.txt --excel book.xlsx --render
         """
     )
     
@@ -470,13 +1076,43 @@ Examples:
                         help='Single segment to search')
     parser.add_argument('--range', '-r',
                         help='Specific range of rows to process (e.g., 1-10, 5-, -20). 1=A2.')
+    parser.add_argument('--render', action='store_true',
+                        help='Draw the matched lines with Pillow instead of screenshotting Notepad++')
     
     args = parser.parse_args()
     
+    # Pause pyautogui inserts after every call. Each GUI step already waits on
+    # the window/caret state it needs, so none is required; EDI_UI_DELAY
+    # (seconds) slows the keystrokes down on a sluggish machine
+    ui_delay_setting = os.environ.get('EDI_UI_DELAY', '0')
+    try:
+        ui_delay = float(ui_delay_setting)
+    except ValueError:
+        print(f"❌ Invalid EDI_UI_DELAY: {ui_delay_setting}. Expected a number of seconds >= 0.")
+        sys.exit(1)
+    if not ui_delay >= 0:
+        print(f"❌ Invalid EDI_UI_DELAY: {ui_delay_setting}. Expected a number of seconds >= 0.")
+        sys.exit(1)
+    
+    if not PIL_AVAILABLE:
+        print(f"❌ Missing library: {PIL_IMPORT_ERROR}")
+        print("   Run: pip install pillow")
+        sys.exit(1)
+    
+    # Notepad++ mode drives the GUI; --render only needs Pillow
+    if not args.render and not LIBS_AVAILABLE:
+        print(f"❌ Missing library: {IMPORT_ERROR}")
+        print("   Run: pip install pyautogui pywin32")
+        print("   (or use --render to draw the lines without Notepad++)")
+        sys.exit(1)
+    
+    if LIBS_AVAILABLE:
+        pyautogui.PAUSE = ui_delay
+    
     if args.excel:
-        process_excel(args.file, args.excel, row_range=args.range)
+        process_excel(args.file, args.excel, row_range=args.range, render=args.render)
     elif args.segment:
-        process_single_segment(args.file, args.segment)
+        process_single_segment(args.file, args.segment, render=args.render)
     else:
         print("❌ Please provide either --excel or --segment")
         parser.print_help()